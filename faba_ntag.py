@@ -43,15 +43,68 @@
 
 import re
 import time
-import string
+import functools
+import select
 import serial
 import logging
 import argparse
 import binascii
 import serial.tools.list_ports
 from adafruit_pn532.uart import PN532_UART
-
-VALID_TAG_TYPES = {"NTAG203", "NTAG213", "NTAG215", "NTAG216"}
+from adafruit_pn532.adafruit_pn532 import BusyError
+
+# Per type: CC size byte, NDEF TLV memory size (MLen), total pages, factory pages 04-05 restored by erase
+NTAG_SPECS = {
+    "NTAG203": {"cc": 0x12, "mlen": 0x6D, "pages": 42,
+                "erase04": bytes((0x01, 0x03, 0xA0, 0x0C)), "erase05": bytes((0x34, 0x03, 0x00, 0xFE))},
+    "NTAG213": {"cc": 0x12, "mlen": 0xA0, "pages": 45,
+                "erase04": bytes((0x01, 0x03, 0xA0, 0x0C)), "erase05": bytes((0x34, 0x03, 0x00, 0xFE))},
+    "NTAG215": {"cc": 0x3E, "mlen": 0xE0, "pages": 135,
+                "erase04": bytes((0x03, 0x00, 0xFE, 0x00)), "erase05": bytes(4)},
+    "NTAG216": {"cc": 0x6D, "mlen": 0xFA, "pages": 231,
+                "erase04": bytes((0x03, 0x00, 0xFE, 0x00)), "erase05": bytes(4)},
+}
+
+VALID_TAG_TYPES = set(NTAG_SPECS)
+NTAG_SIZES = tuple(sorted(spec["pages"] for spec in NTAG_SPECS.values()))
+SIZE_TO_MLEN = {spec["pages"]: spec["mlen"] for spec in NTAG_SPECS.values()}
+
+def build_cc_table(specs):
+    # CC size byte -> [(total pages, type)], smallest first
+    table = {}
+    for tag_type, spec in sorted(specs.items(), key=lambda item: item[1]["pages"]):
+        table.setdefault(spec["cc"], []).append((spec["pages"], tag_type))
+    return table
+
+CC_TABLE = build_cc_table(NTAG_SPECS)
+
+UID_PATTERN = re.compile(r"[0-9a-fA-F]{14}")  # 7-byte UID as hex
+FABA_ID_PATTERN = re.compile(r"\d{4}")
+
+log = logging.getLogger()
+
+# FabaID text record: NDEF message header, record header and terminator TLV
+FABA_PAGE05 = bytes((0x34, 0x03, 0x15, 0xD1))
+FABA_PAGE06 = bytes((0x01, 0x11, 0x54, 0x02))  # Fixed for FabaID
+FABA_PAGE11 = bytes((0xFE, 0x00, 0x00, 0x00))
+
+# Default values of the last 5 pages (dynamic lock and configuration)
+LAST5 = bytes((0x00, 0x00, 0x00, 0xBD,
+               0x04, 0x00, 0x00, 0xFF,
+               0x00, 0x00, 0x00, 0x00,
+               0x00, 0x00, 0x00, 0x00,
+               0x00, 0x00, 0x00, 0x00))
+
+# Translation tables for dumps: printable ASCII kept, everything else shown as '.' or dropped
+ASCII_TABLE = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256))
+NON_PRINTABLE = bytes(b for b in range(256) if not 0x20 <= b < 0x7F)
+
+PN532_ACK = b"\x00\x00\xFF\x00\xFF\x00"
+PN532_INDATAEXCHANGE = 0x40
+PN532_INAUTOPOLL = 0x60
+NTAG_READ = 0x30  # 4 pages per command, supported by every NTAG/Ultralight
+NTAG_FAST_READ = 0x3A  # Any page range, not implemented by NTAG203 and original Ultralight
+FAST_READ_PAGES = 16  # Pages per FAST_READ, keeps the response well within a single PN532 frame
 
 class NTAGData:
     def __init__(self):
@@ -59,6 +112,7 @@ class NTAGData:
         self.uid = None
         self.type = "Unknown"
         self.size = 0
+        self.fast_read = True
 
     def add_page(self, page, data):
         self.pages[page] = data
@@ -73,12 +127,7 @@ class NTAGData:
     #        print(f"Page {page:02X}:  {hex_part:<12} |  {ascii_part}")
 
     def read_page(self, page_number):
-        if page_number in self.pages:
-            page_data = self.pages[page_number]
-            return page_data
-        else:
-            print(f"Page {page_number} not found.")
-            return None
+        return self.pages.get(page_number)
     
     def get_all_bytes(self):
         all_data = bytearray()
@@ -87,10 +136,107 @@ class NTAGData:
         return all_data
 
 
+def wait_for_data(uart, timeout=None):
+    if uart.in_waiting:
+        return True
+
+    try:
+        fd = uart.fileno()
+    except (AttributeError, OSError):
+        # No selectable handle (e.g. Windows COM port), fall back to polling
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not uart.in_waiting:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    readable, _, _ = select.select([fd], [], [], timeout)
+    return bool(readable)
+
+
+class PN532_Serial(PN532_UART):
+    # PN532_UART sleeps between readiness checks, reads fixed sizes until the serial timeout expires
+    # and throws away whatever is left over, which can desync the next frame. Keep a receive buffer
+    # instead and hand out frames as soon as they are complete, leaving residual bytes for the next read
+
+    def __init__(self, uart, **kwargs):
+        self._rxbuf = bytearray()
+        super().__init__(uart, **kwargs)
+
+    def _frame_end(self):
+        # Drop anything before a valid start code, returns the end of the first complete frame or None
+        while True:
+            start = self._rxbuf.find(b"\x00\xFF")
+            if start < 0:
+                del self._rxbuf[:-1]  # Last byte may be the first half of a start code
+                return None
+            del self._rxbuf[:start]
+
+            if len(self._rxbuf) < 4:
+                return None
+            length, lcs = self._rxbuf[2], self._rxbuf[3]
+
+            # 00 FF LEN LCS data DCS, the ACK frame (LEN 00, LCS FF) ends with its postamble instead of a DCS
+            if (length + lcs) & 0xFF == 0 or (length, lcs) == (0x00, 0xFF):
+                end = 5 + length
+                return end if len(self._rxbuf) >= end else None
+
+            # Not a frame header, resync on the next start code
+            del self._rxbuf[:2]
+
+    def _receive(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._frame_end() is None:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if not wait_for_data(self._uart, remaining):
+                return False
+            self._rxbuf += self._uart.read(self._uart.in_waiting or 1)
+        return True
+
+    def _wait_ready(self, timeout=1):
+        return self._receive(timeout)
+
+    def _read_data(self, count):
+        if not self._receive(self._uart.timeout or 1):
+            raise BusyError("Did not receive data from UART")
+
+        end = self._frame_end()
+        frame = b"\x00" + bytes(self._rxbuf[:end])  # Restore the preamble dropped while resyncing
+        del self._rxbuf[:end]
+
+        if self.debug:
+            print("Reading: ", [hex(i) for i in frame])
+        return frame
+
+    def _write_data(self, framebytes):
+        # Drop stale bytes and abort anything still running (e.g. a pending InAutoPoll) before the command
+        self._rxbuf.clear()
+        self._uart.reset_input_buffer()
+        self._uart.write(PN532_ACK + framebytes)
+
+
+def set_low_latency(serial_port):
+    # USB-serial adapters (FTDI) hold each frame up to 16 ms by default, ASYNC_LOW_LATENCY cuts it to ~1 ms
+    if not hasattr(serial_port, "set_low_latency_mode"):
+        return False
+
+    try:
+        serial_port.set_low_latency_mode(True)
+        logging.debug("Serial port low latency mode enabled")
+        return True
+    except (NotImplementedError, OSError, ValueError) as e:
+        logging.debug(f"Serial port low latency mode not available: {e}")
+        return False
+
+
 def init_pn532(port):
     try:
         serial_port = serial.Serial(port, baudrate=115200, timeout=1)
-        pn532 = PN532_UART(serial_port, debug=False)
+        set_low_latency(serial_port)
+        pn532 = PN532_Serial(serial_port, debug=False)
         ic, ver, rev, support = pn532.firmware_version
         logging.info(f"Found PN532 with firmware version: {ver}.{rev}")
         pn532.SAM_configuration()
@@ -103,71 +249,178 @@ def init_pn532(port):
 def wait_for_card(pn532):
     logging.info("Waiting for NTAG card...")
     while True:
-        uid = pn532.read_passive_target(timeout=0.5)
-        #print(".", end=" ", flush=True)
-        if uid:
-            logging.info(f"  UID:    {' '.join([f'{byte:02X}' for byte in uid])}")
+        # Let the PN532 poll the field by itself and sleep on the serial port until it reports a tag
+        # Without the ACK the poll never started and waiting with no timeout would hang
+        if not pn532.send_command(PN532_INAUTOPOLL, params=[0xFF, 0x02, 0x00]):  # Endless, 2x150 ms, generic 106 kbps
+            logging.error("PN532 did not acknowledge InAutoPoll")
+            return None
+        response = pn532.process_response(PN532_INAUTOPOLL, response_length=30, timeout=None)
+
+        # NbTg, Type, Len, then target data: Tg, SENS_RES (2), SEL_RES, NFCID length, NFCID
+        if response and response[0] > 0:
+            target = response[3:3 + response[2]]
+            uid = bytes(target[5:5 + target[4]])
+            logging.info(f"  UID:    {uid.hex(' ').upper()}")
             return uid
 
 
 def detect_card(pn532, ntag):
     ntag.uid = wait_for_card(pn532)
+    if ntag.uid is None:
+        return False
 
-    # Read all pages
-    page = 0
-    while True:
-        data = read_page(pn532, page)
-        if not data:
-            break
-        ntag.add_page(page, data)
-        page = page + 1
-    
-    cc_byte = ntag.read_page(3)[2]
+    # Pages 00-03 first, the CC byte tells how many pages to expect
+    page = read_pages(pn532, ntag, 0, 3)
+    if page < 4:
+        # No FAST_READ support (NTAG203, Ultralight), the NAK left the tag idle
+        if not reselect_card(pn532, ntag):
+            return False
+        ntag.fast_read = False
+        logging.debug("  FAST_READ not supported, using READ")
+        page = read_pages(pn532, ntag, 0, 3)
+    if page < 4:
+        logging.error("Failed to read Capability Container")
+        return False
+
+    cc_byte = ntag.pages[3][2]
     #logging.debug(f"  Capability Container (CC) byte: 0x{cc_byte:02X}")
-    
-    # Verify CC and total pages identified
-    if cc_byte == 0x12:
-        if page == 42:
-            ntag.type = "NTAG203"
-        elif page == 45:
-            ntag.type = "NTAG213"
-        else:
-            page = 45; # Force page size
-            ntag.type = "NTAG213" # NTAG213 Clone
-    elif cc_byte == 0x3E:
-        if page == 135:
-            ntag.type = "NTAG215"
-        else:
-            page = 135; # Force page size
-            ntag.type = "NTAG215" # NTAG215 Clone  
-    elif cc_byte == 0x6D:
-        if page == 231:
-            ntag.type = "NTAG216"
-        else:
-            page = 231; # Force page size
-            ntag.type = "NTAG216" # NTAG216 Clone   
+
+    candidates = CC_TABLE.get(cc_byte)
+    halted = False
+    if candidates:
+        # Extend the read to each candidate size, a NAK means the previous one was right
+        size, ntag.type = candidates[-1]  # Clone, force page size
+        for candidate_size, candidate_type in candidates:
+            page = read_pages(pn532, ntag, page, candidate_size - 1)
+            if page < candidate_size:
+                halted = True
+                break
+            size, ntag.type = candidate_size, candidate_type
+        page = size
     else:
+        # Unknown CC, read until the tag stops answering
+        page = read_pages(pn532, ntag, page)
         ntag.type = "Unknown"
-    
+        halted = True
+
+        # The NAK dropped the whole window, walk it page by page to find the exact last page
+        if not reselect_card(pn532, ntag):
+            return False
+        while True:
+            block = read_block(pn532, page)
+            if block is None:
+                break
+            ntag.add_page(page, block[:4])
+            page += 1
+
+    # A NAK sends the tag back to idle, select it again so later writes reach it
+    if halted and not reselect_card(pn532, ntag):
+        return False
+
     ntag.size = page
     logging.info(f"  Type:   {ntag.type} [CC: 0x{cc_byte:02X}]")
     logging.info(f"  Pages:  {ntag.size}")
     return True
 
 
-def read_page(pn532, page):
-    try:
-        data = pn532.ntag2xx_read_block(page)
-        return data
+def reselect_card(pn532, ntag):
+    if pn532.read_passive_target(timeout=0.5) != ntag.uid:
+        logging.error("UID not matching initial read")
+        return False
+    return True
+
+
+def fast_read_window_end(page):
+    end = page + FAST_READ_PAGES
+    for size in NTAG_SIZES:
+        if page < size < end:
+            end = size
+            break
+    return end - 1
+
 
+def read_pages(pn532, ntag, start, end=None):
+    # Read pages start..end (or until the first NAK) into ntag, returns the first page not read
+    page = start
+    while end is None or page <= end:
+        last = fast_read_window_end(page)
+        if end is not None:
+            last = min(last, end)
+        data = read_pages_bulk(pn532, page, last, ntag.fast_read)
+        if not data:
+            break
+        for i in range(0, len(data), 4):
+            ntag.add_page(page + i // 4, data[i:i+4])
+        page = last + 1
+    return page
+
+
+def read_range(pn532, ntag, first, last):
+    # Read pages first..last in FAST_READ windows (READ if unsupported), returns bytes or None if any window fails
+    data = bytearray()
+    for start in range(first, last + 1, FAST_READ_PAGES):
+        chunk = read_pages_bulk(pn532, start, min(start + FAST_READ_PAGES - 1, last), ntag.fast_read)
+        if chunk is None:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def read_block(pn532, page):
+    # READ returns 4 pages from page on, a NAK means page is past the end of memory
+    try:
+        response = pn532.call_function(
+            PN532_INDATAEXCHANGE,
+            params=[0x01, NTAG_READ, page],  # Tg 1, READ page
+            response_length=17
+        )
     except Exception as e:
         logging.warning(f"Error reading page {page}: {e}")
         return None
 
+    if not response or response[0] != 0x00 or len(response) != 17:
+        return None
+    return bytes(response[1:])
+
+
+def read_pages_slow(pn532, start, end):
+    # READ wraps around to page 0 past the last page, so end itself must answer too
+    data = bytearray()
+    for page in range(start, end + 1, 4):
+        block = read_block(pn532, page)
+        if block is None:
+            return None
+        data += block
+    if (end - start) % 4 and read_block(pn532, end) is None:
+        return None
+    return bytes(data[:4 * (end - start + 1)])
+
+
+def read_pages_bulk(pn532, start, end, fast_read=True):
+    if not fast_read:
+        return read_pages_slow(pn532, start, end)
+
+    try:
+        response = pn532.call_function(
+            PN532_INDATAEXCHANGE,
+            params=[0x01, NTAG_FAST_READ, start, end],  # Tg 1, FAST_READ start..end
+            response_length=1 + 4 * (end - start + 1)
+        )
+    except Exception as e:
+        logging.warning(f"Error reading pages {start}-{end}: {e}")
+        return None
+
+    # Status byte 0x00 means the tag answered, anything else is a NAK (e.g. end of memory).
+    # A short reply would leave pages missing, treat it as a failed read
+    if not response or response[0] != 0x00 or len(response) != 1 + 4 * (end - start + 1):
+        return None
+    return bytes(response[1:])
+
 
 def parse_text(ntag):
     # Read page 6
-    page6 = ntag.read_page(6)
+    pages = ntag.pages
+    page6 = pages.get(6)
     if page6 is None:
         logging.error("Failed to read Page 6")
         return
@@ -178,10 +431,11 @@ def parse_text(ntag):
     type_field     = page6[2]  # 54 - 'T' for Text Record
     status_byte    = page6[3]  # 02 - Status byte (lang length = 2)
     
-    logging.debug(f"  Header:   0x{ndef_header:02X} [0x01]")
-    logging.debug(f"  Payload:  0x{payload_length:02X} [0x11]")
-    logging.debug(f"  Type:     0x{type_field:02X} [0x54]")
-    logging.debug(f"  Status:   0x{status_byte:02X} [0x02]")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("  Header:   0x%02X [0x01]", ndef_header)
+        log.debug("  Payload:  0x%02X [0x11]", payload_length)
+        log.debug("  Type:     0x%02X [0x54]", type_field)
+        log.debug("  Status:   0x%02X [0x02]", status_byte)
 
     if type_field != 0x54:
         logging.info(f"No text record found [0x{type_field:02X}]")
@@ -191,36 +445,34 @@ def parse_text(ntag):
     encoding = "UTF-16" if (status_byte & 0x80) else "UTF-8"
 
     # Read next pages to get full payload
-    full_payload = []
+    tail = bytearray()
     next_page = 7
-    remaining_bytes = payload_length
 
-    while remaining_bytes > 0:
-        page_data = ntag.read_page(next_page)
+    while len(tail) < payload_length:
+        page_data = pages.get(next_page)
         if page_data is None:
             logging.debug(f"Page {next_page} missing, stopping read")
             break
-
-        for byte in page_data:
-            if remaining_bytes == 0 or byte == 0xFE:  # Stop at payload_length or terminator TLV
-                break
-            full_payload.append(byte)
-            remaining_bytes -= 1
-
+        tail += page_data
         next_page += 1
 
+    # Stop at payload_length or terminator TLV
+    end = tail.find(0xFE, 0, payload_length)
+    full_payload = bytes(tail[:payload_length if end < 0 else end])
+
     # Extract language code and text content
     if len(full_payload) < lang_length:
         logging.error("Invalid NDEF record: insufficient data for language code")
         return
 
-    lang_code = bytes(full_payload[:lang_length]).decode("ascii")  # Language code
-    text_content = bytes(full_payload[lang_length:]).decode(encoding)  # Extract text
+    lang_code = full_payload[:lang_length].decode("ascii")  # Language code
+    text_content = full_payload[lang_length:].decode(encoding)  # Extract text
 
-    logging.debug(f"NTAG content:")
-    logging.debug(f"  Encoding: {encoding}")
-    logging.debug(f"  Language: {lang_code}")
-    logging.debug(f"  Text:     {text_content}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("NTAG content:")
+        log.debug("  Encoding: %s", encoding)
+        log.debug("  Language: %s", lang_code)
+        log.debug("  Text:     %s", text_content)
     if text_content.startswith("02190530") and len(text_content) >= 12:
         extracted_id = text_content[8:12]  # Extract next 4 digits
         ntag.code = extracted_id
@@ -231,69 +483,56 @@ def parse_text(ntag):
 
 def create_byte_array(input_str, ntag):
 
-    size_to_mlen = {
-        42:  0x6D,  # NTAG203
-        45:  0xA0,  # NTAG213
-        135: 0xE0,  # NTAG215
-        231: 0xFA   # NTAG216
-    }
-
     # Get MLen based on size, default to 0xA0 (NTAG213)
-    mlen = size_to_mlen.get(ntag.size, 0xA0)
+    mlen = SIZE_TO_MLEN.get(ntag.size, 0xA0)
+
+    # Whole tag image, pages not filled below stay empty
+    byte_array = bytearray(ntag.size * 4)
+    pages = ntag.pages
 
-    page04 = [0x01, 0x03, mlen, 0x0C]
-    page05 = [0x34, 0x03, 0x15, 0xD1]
-    page06 = [0x01, 0x11, 0x54, 0x02]  # Fixed for FabaID
-    page11 = [0xFE, 0x00, 0x00, 0x00]
-    
     # Pages 00-03
-    pages0_3 = []
-    for i in range(4):  
-        page = ntag.read_page(i)
+    for i in range(4):
+        page = pages.get(i)
         if page is not None and len(page) == 4:
-            pages0_3.extend(page)
-        else:
-            pages0_3.extend([0x00] * 4) # Default empty
-    
+            byte_array[i*4:i*4+4] = page
+
+    byte_array[16:20] = (0x01, 0x03, mlen, 0x0C)
+    byte_array[20:24] = FABA_PAGE05
+    byte_array[24:28] = FABA_PAGE06
+
     # Pages 07-10
     if input_str:
-        hex_data = input_str.encode('utf-8').hex()
-        pages7_10 = [int(hex_data[i:i+2], 16) for i in range(0, len(hex_data), 2)]
-    
+        text = input_str.encode('utf-8')
+        byte_array[28:28+len(text)] = text
+
     else:
-        pages7_10 = []
         for i in range(7, 11):
-            page = ntag.read_page(i)
+            page = pages.get(i)
             if page is not None and len(page) == 4:
-                pages7_10.extend(page)
-            else:
-                pages7_10.extend([0x00] * 4) # Default empty
-    
-    # Create default values array
-    last5 = [0x00, 0x00, 0x00, 0xBD,
-             0x04, 0x00, 0x00, 0xFF,
-             0x00, 0x00, 0x00, 0x00,
-             0x00, 0x00, 0x00, 0x00,
-             0x00, 0x00, 0x00, 0x00]
-    
-    byte_array = pages0_3 + page04 + page05 + page06 + pages7_10 + page11 + [0x00] * (ntag.size - 17) * 4 + last5
-    #byte_array = [0x00] * 16 + page04 + page05 + page06 + [int(hex_data[i:i+2], 16) for i in range(0, len(hex_data), 2)] + page11
+                byte_array[i*4:i*4+4] = page
+
+    byte_array[44:48] = FABA_PAGE11
+    byte_array[-20:] = LAST5
     return byte_array
 
 
 def print_byte_array(byte_array):
-    logging.debug(" ")
-    logging.debug("Content:")
-    logging.debug(" ")
-    logging.debug(f"Page       HEX          |  ASCII")
-    logging.debug(f"---------  -----------  |  -----")
-    for i in range(0, len(byte_array), 4):
-        chunk = byte_array[i:i+4]
-        hex_part = ' '.join(f'{byte:02X}' for byte in chunk)
-        ascii_part = ''.join(chr(byte) if chr(byte) in string.printable and byte >= 0x20 else '.' for byte in chunk)
-        logging.debug(f"Page {i//4:03d}:  {hex_part:<12} |  {ascii_part}")
+    if not log.isEnabledFor(logging.DEBUG):
+        return
 
+    log.debug(" ")
+    log.debug("Content:")
+    log.debug(" ")
+    log.debug("Page       HEX          |  ASCII")
+    log.debug("---------  -----------  |  -----")
+    data = bytes(byte_array)
+    hex_all = binascii.hexlify(data, ' ').decode().upper()
+    ascii_all = data.translate(ASCII_TABLE).decode('ascii')
+    for i in range(0, len(data), 4):
+        log.debug("Page %03d:  %-12s |  %s", i // 4, hex_all[i*3:i*3+11], ascii_all[i:i+4])
 
+
+@functools.lru_cache(maxsize=10000)  # One entry per 4-digit FabaID
 def encode_faba_id(id):
     text = "en02190530" + id + "00"
     return text
@@ -304,120 +543,108 @@ def read_ntag(ntag):
 
 
 def write_ntag(pn532, id, ntag):
-    logging.info(f"Writing tag with UID: {' '.join([f'{byte:02X}' for byte in ntag.uid])}")
+    logging.info(f"Writing tag with UID: {ntag.uid.hex(' ').upper()}")
     logging.info(f"FabaID: {id}")
     text = encode_faba_id(id)
     logging.debug(f" Encoded FabaID: {text}")
     byte_array = create_byte_array(text, ntag)
     print_byte_array(byte_array)
     if write_blocks(pn532, byte_array, 4, 11, ntag):
-        if verify_blocks(pn532, byte_array, 4, 11):
+        if verify_blocks(pn532, byte_array, 4, 11, ntag):
             logging.info("NTAG successfully written")
             # Dump content
             dump_ntag(byte_array, ntag)
 
 
 def write_blocks(pn532, byte_array, start, end, ntag):
-    logging.debug(" ")
-    logging.debug("Write:")
-    logging.debug(" ")
-    logging.debug(f"Page       HEX          |  Status")
-    logging.debug(f"---------  -----------  |  ------")
-    uid = pn532.read_passive_target(timeout=0.5)
-    
-    if uid == ntag.uid:
-        for block_num in range(start, end + 1):
-            start_idx = block_num * 4
-            end_idx = start_idx + 4
-            block_data = byte_array[start_idx:end_idx]
-            
-            try:
-                wr = pn532.ntag2xx_write_block(block_num, block_data)
-                logging.debug(f"Page {block_num:03d}:  " + " ".join([f"{byte:02X}" for byte in block_data]) + f"  |  {wr}")
-                if wr == False:
-                    logging.error(f"Failed writing page {block_num}")
-                    return False
-            except Exception as e:
-                logging.error(f"Error writing page {block_num}: {e}")
+    debug = log.isEnabledFor(logging.DEBUG)
+    log.debug(" ")
+    log.debug("Write:")
+    log.debug(" ")
+    log.debug("Page       HEX          |  Status")
+    log.debug("---------  -----------  |  ------")
+    mv = memoryview(byte_array)
+
+    # The tag is still selected from detect_card, a missing tag makes the first write fail
+    for block_num in range(start, end + 1):
+        start_idx = block_num * 4
+        end_idx = start_idx + 4
+        block_data = mv[start_idx:end_idx]
+
+        # Pages read by detect_card act as a write-back cache, skip the ones already holding the data.
+        # PWD and PACK (last 2 pages) always read back as zeros, so they are always written
+        cached = ntag.pages.get(block_num)
+        if block_num < ntag.size - 2 and cached is not None and bytes(cached) == bytes(block_data):
+            if debug:
+                log.debug("Page %03d:  %s  |  Cached", block_num, bytes(block_data).hex(' ').upper())
+            continue
+
+        try:
+            wr = pn532.ntag2xx_write_block(block_num, block_data)
+            if debug:
+                log.debug("Page %03d:  %s  |  %s", block_num, bytes(block_data).hex(' ').upper(), wr)
+            if wr == False:
+                logging.error(f"Failed writing page {block_num}")
                 return False
-    
-    else:
-        logging.error(f"UID not matching initial read")
-        return False
+            ntag.add_page(block_num, bytes(block_data))
+        except Exception as e:
+            logging.error(f"Error writing page {block_num}: {e}")
+            return False
     
     return True
 
 
-def verify_blocks(pn532, byte_array, start, end):
-    logging.debug(" ")
-    logging.debug("Verify:")
-    logging.debug(" ")
-    logging.debug(f"Page       Expected     ::  Read")
-    logging.debug(f"---------  -----------  ::  -----------")
-    for block_num in range(start, end + 1):
-        start_idx = block_num * 4
-        end_idx = start_idx + 4
-        expected_data = byte_array[start_idx:end_idx]
-
-        read_data = read_page(pn532, block_num)
-        if read_data is None:
-            logging.error(f"Error: Failed to read page {block_num}")
-            return False
+def verify_blocks(pn532, byte_array, start, end, ntag):
+    debug = log.isEnabledFor(logging.DEBUG)
+    log.debug(" ")
+    log.debug("Verify:")
+    log.debug(" ")
+    log.debug("Page       Expected     ::  Read")
+    log.debug("---------  -----------  ::  -----------")
+    expected = bytes(byte_array[start*4:(end+1)*4])
+    actual = read_range(pn532, ntag, start, end)
+    if actual is None:
+        logging.error(f"Error: Failed to read pages {start}-{end}")
+        return False
 
-        # Convert both expected data and read data to hex strings
-        expected_hex = " ".join([f"{byte:02X}" for byte in expected_data])
-        read_hex = " ".join([f"{byte:02X}" for byte in list(read_data)])
-        logging.debug(f"Page {block_num:03d}:  {expected_hex}  ::  {read_hex}")
-        
+    if debug:
+        for i in range(0, len(expected), 4):
+            log.debug("Page %03d:  %s  ::  %s", start + i // 4, expected[i:i+4].hex(' ').upper(), actual[i:i+4].hex(' ').upper())
 
-        if expected_hex != read_hex:
-            logging.error(f"Mismatch at page {block_num}: expected {expected_hex}, got {read_hex}")
-            return False
+    if actual != expected:
+        i = next(i for i, (a, b) in enumerate(zip(expected, actual)) if a != b) // 4 * 4
+        logging.error(f"Mismatch at page {start + i//4}: expected {expected[i:i+4].hex(' ').upper()}, got {actual[i:i+4].hex(' ').upper()}")
+        return False
     
     return True
 
 
 def erase_ntag(pn532, ntag):
     logging.info("Erasing NTAG")
-    logging.info(f"  UID :   {' '.join([f'{byte:02X}' for byte in ntag.uid])}")
+    logging.info(f"  UID :   {ntag.uid.hex(' ').upper()}")
     logging.info(f"  Type:   {ntag.type}")
     
-    # NTAG203 and NTAG213
-    if ntag.type == "NTAG203" or ntag.type == "NTAG213":
-        page04 = [0x01, 0x03, 0xA0, 0x0C]
-        page05 = [0x34, 0x03, 0x00, 0xFE]      
-       
-    # NTAG215 and NTAG216 
-    if ntag.type == "NTAG215" or ntag.type == "NTAG216":
-        page04 = [0x03, 0x00, 0xFE, 0x00]
-        page05 = [0x00, 0x00, 0x00, 0x00]
-    
-    # Unknown
-    if ntag.type == "Unknown":
-        page04 = [0x00, 0x00, 0x00, 0x00]
-        page05 = [0x00, 0x00, 0x00, 0x00] 
-
-    # Create default values array
-    last5 = [0x00, 0x00, 0x00, 0xBD,
-             0x04, 0x00, 0x00, 0xFF,
-             0x00, 0x00, 0x00, 0x00,
-             0x00, 0x00, 0x00, 0x00,
-             0x00, 0x00, 0x00, 0x00]
-    
-    erase = [0x00] * 16 + page04 + page05 + [0x00] * (ntag.size - 11) * 4 + last5
+    erase = bytearray(ntag.size * 4)
+
+    # Unknown tags get pages 04-05 cleared
+    spec = NTAG_SPECS.get(ntag.type)
+    if spec:
+        erase[16:20] = spec["erase04"]
+        erase[20:24] = spec["erase05"]
+    erase[-20:] = LAST5
     print_byte_array(erase)
     if write_blocks(pn532, erase, 4, ntag.size - 1, ntag):
-        if verify_blocks(pn532, erase, 4, ntag.size - 1):
+        if verify_blocks(pn532, erase, 4, ntag.size - 1, ntag):
             logging.info("NTAG successfully erased") 
 
 
 def dump_ntag(byte_array, ntag):
     if len(byte_array) > 43:
         filename_bytes = byte_array[38:42]
-        filename = ''.join(chr(byte) if chr(byte) in string.printable and byte >= 0x20 else '' for byte in filename_bytes)
+        filename = bytes(filename_bytes).translate(None, NON_PRINTABLE).decode('ascii')
 
         if filename == "": # If empty, use UID
-            filename = ''.join([f'{byte:02X}' for byte in ntag.uid])
+            filename = ntag.uid.hex().upper()
         
         logging.info(f"Saving files")
 
@@ -427,7 +654,7 @@ def dump_ntag(byte_array, ntag):
 
 
 def crete_ntag(uid, type, id):
-    logging.info(f"  UID:    {' '.join([f'{byte:02X}' for byte in uid])}")
+    logging.info(f"  UID:    {uid.hex(' ').upper()}")
     logging.info(f"  Type:   {type}")
     logging.info(f"  FabaID: {id}")
 
@@ -438,30 +665,23 @@ def crete_ntag(uid, type, id):
     bcc0 = CT ^ uid[0] ^ uid[1] ^ uid[2]
     bcc1 = uid[3] ^ uid[4] ^ uid[5] ^ uid[6]
 
-    page00 = [uid[0], uid[1], uid[2], bcc0]
-    page01 = [uid[3], uid[4], uid[5], uid[6]]
-    page02 = [bcc1, 0x48, 0x00, 0x00]
-
-    ntag_specs = {
-        "NTAG203": {"capc": 0x12, "mlen": 0x6D, "ntag_size": 42},
-        "NTAG213": {"capc": 0x12, "mlen": 0xA0, "ntag_size": 45},
-        "NTAG215": {"capc": 0x3E, "mlen": 0xE0, "ntag_size": 135},
-        "NTAG216": {"capc": 0x6D, "mlen": 0xFA, "ntag_size": 231},
-    }
+    page00 = bytes((uid[0], uid[1], uid[2], bcc0))
+    page01 = uid[3:7]
+    page02 = bytes((bcc1, 0x48, 0x00, 0x00))
 
-    if type not in ntag_specs:
+    if type not in NTAG_SPECS:
         raise ValueError(f"Unsupported tag type: {type}")
 
-    spec = ntag_specs[type]
+    spec = NTAG_SPECS[type]
 
-    page03 = [0xE1, 0x10, spec["capc"], 0x00]
-    page04 = [0x01, 0x03, spec["mlen"], 0x0C]
+    page03 = bytes((0xE1, 0x10, spec["cc"], 0x00))
+    page04 = bytes((0x01, 0x03, spec["mlen"], 0x0C))
     
     # Create NTAGData instance and assign properties
     ntag = NTAGData()
     ntag.uid = uid
     ntag.type = type
-    ntag.size = spec["ntag_size"]
+    ntag.size = spec["pages"]
     ntag.add_page(0, page00)
     ntag.add_page(1, page01)
     ntag.add_page(2, page02)
@@ -479,18 +699,13 @@ def save_raw(byte_array, filename):
     filename = f"{filename}.raw"
 
     try:
-        lines = []
+        data = bytes(byte_array)
+        data += bytes(-len(data) % 4)  # Pad incomplete pages
+        hex_all = binascii.hexlify(data).upper()
+        body = b"\n".join([hex_all[i:i+8] for i in range(0, len(hex_all), 8)])
 
-        for i in range(0, len(byte_array), 4):
-            chunk = byte_array[i:i+4]
-            if len(chunk) < 4:
-                chunk += [0] * (4 - len(chunk))  # Pad incomplete pages
-            hex_part = ''.join(f'{byte:02X}' for byte in chunk)
-            lines.append(f"{hex_part:<8}")
-
-
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines))
+        with open(filename, "wb") as f:
+            f.write(body)
 
         logging.info(f"  RAW             : {filename}")
         return True
@@ -533,7 +748,7 @@ def save_flipper(byte_array, ntag, filename):
             "# Device type can be ISO14443-3A, ISO14443-3B, ISO14443-4A, ISO14443-4B, ISO15693-3, FeliCa, NTAG/Ultralight, Mifare Classic, Mifare Plus, Mifare DESFire, SLIX, ST25TB, EMV",
             "Device type: NTAG/Ultralight",
             "# UID is common for all formats",
-            f"UID: {' '.join(f'{byte:02X}' for byte in ntag.uid)}",
+            f"UID: {ntag.uid.hex(' ').upper()}",
             "# ISO14443-3A specific data",
             "ATQA: 00 44",
             "SAK: 00",
@@ -552,17 +767,14 @@ def save_flipper(byte_array, ntag, filename):
             f"Pages read: {ntag.size}",
         ]
 
-        for i in range(0, len(byte_array), 4):
-            chunk = byte_array[i:i+4]
-            if len(chunk) < 4:
-                chunk += [0] * (4 - len(chunk))  # Pad incomplete pages
-            hex_part = ' '.join(f'{byte:02X}' for byte in chunk)
-            lines.append(f"Page {i//4}: {hex_part:<11}")
-
-        lines.append("Failed authentication attempts: 0")
+        data = bytes(byte_array)
+        data += bytes(-len(data) % 4)  # Pad incomplete pages
+        hex_all = binascii.hexlify(data, b' ').upper()
+        page_lines = [b"Page %d: %s" % (i // 4, hex_all[i*3:i*3+11]) for i in range(0, len(data), 4)]
+        body = b"\n".join(["\n".join(lines).encode("utf-8")] + page_lines + [b"Failed authentication attempts: 0"])
 
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines))
+        with open(filename, "wb") as f:
+            f.write(body)
 
         logging.info(f"  Flipper Zero NFC: {filename}")
         return True
@@ -612,11 +824,11 @@ def main():
             uid_str, tag_type, tag_id = args.create
 
             # Validate UID (must be 14 hex chars representing 7 bytes)
-            if not re.fullmatch(r"[0-9a-fA-F]{14}", uid_str):
+            if not UID_PATTERN.fullmatch(uid_str):
                 logging.error("UID must be a 7-byte hexadecimal string (14 hex characters, e.g., '04742FF1780000')")
                 return False
 
-            uid = [int(uid_str[i:i+2], 16) for i in range(0, 14, 2)]
+            uid = bytes.fromhex(uid_str)
 
             # Validate type
             if tag_type.upper() not in VALID_TAG_TYPES:
@@ -624,7 +836,7 @@ def main():
                 return False
 
             # Validate ID
-            if not re.fullmatch(r"\d{4}", tag_id):
+            if not FABA_ID_PATTERN.fullmatch(tag_id):
                 logging.error("ID must be a 4-digit number")
                 return False
             
@@ -664,7 +876,7 @@ def main():
 
         # Write NTAG
         elif args.write:
-            if re.fullmatch(r"\d{4}", args.write):
+            if FABA_ID_PATTERN.fullmatch(args.write):
                 write_ntag(pn532, args.write, ntag)
             else:
                 logging.error("Invalid ID format. Must be a 4-digit number (e.g., '1234').")
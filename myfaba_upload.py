@@ -20,43 +20,114 @@
 # This script is provided "as is" without warranty of any kind.
 #
 
+import os
 import re
 import wave
+import struct
 import logging
 import argparse
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.filepost import choose_boundary, encode_multipart_formdata
+from datetime import datetime, timezone
+from html.parser import HTMLParser
 from urllib.parse import urlparse, parse_qs
 
 BASE_URL = "https://studio.myfaba.com/record/"
+SHARE_ID_PATTERN = re.compile(r"([A-Za-z0-9]{10})$")
+
+# Canonical PCM .wav header: RIFF, size, WAVE, "fmt ", fmt size, format, channels, sample rate,
+# byte rate, block align, bits per sample, "data", data size
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+class MultipartBody:
+    # multipart/form-data body: fields and file part headers are encoded once up front,
+    # the file data is streamed from disk between them and the closing boundary
+
+    def __init__(self, fields, name, filename, file, content_type):
+        boundary = choose_boundary()
+
+        # With empty data the file part is last and the body ends with its headers + closing boundary
+        body, self.content_type = encode_multipart_formdata({**fields, name: (filename, b"", content_type)}, boundary=boundary)
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self._head = body[:-len(self._tail)]
+
+        self._file = file
+        self._size = os.fstat(file.fileno()).st_size - file.tell()
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        while chunk := self._file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+        yield self._tail
+
+
+class FormParser(HTMLParser):
+    # Collects the upload form action and the _token value, parsing stops as soon as both are found
+
+    def __init__(self):
+        super().__init__()
+        self.action_url = None
+        self.token = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and attrs.get("id") == "form":
+            self.action_url = attrs.get("action")
+        elif tag == "input" and attrs.get("name") == "_token":
+            self.token = attrs.get("value")
+
+        if self.action_url and self.token:
+            raise StopIteration
+
+
 def check_share_id(share_id):
-    match = re.search(r"([A-Za-z0-9]{10})$", share_id)
+    match = SHARE_ID_PATTERN.search(share_id)
     return match.group(1) if match else None
 
 
+def create_session():
+    # One pooled keep-alive connection for all requests, transient gateway errors are retried.
+    # Only GETs are retried, the upload body is streamed from disk and cannot be replayed
+    # TLS is left to the default adapter: requests already shares one preloaded SSL context
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=frozenset(["GET"]))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
+
 def load_page(session, share_id):
     url = f"{BASE_URL}{share_id}"
     try:
         response = session.get(url, allow_redirects=False)
-        response.raise_for_status()
         
-        if response.status_code == 302:
-            xsrf_token = session.cookies.get("XSRF-TOKEN")
-            myfaba_session = session.cookies.get("myfaba_cms_session")
-            location_url = response.headers.get("Location")
-            
-            if xsrf_token and myfaba_session and location_url:
-                logging.info("Loading page")
-                return xsrf_token, myfaba_session, location_url
+        # Only the redirect to the record page is valid, any other status (errors included) ends here
+        if response.status_code != 302:
+            logging.error("Unexpected response status: %s", response.status_code)
+            return None, None, None
+
+        xsrf_token = session.cookies.get("XSRF-TOKEN")
+        myfaba_session = session.cookies.get("myfaba_cms_session")
+        location_url = response.headers.get("Location")
+        
+        if xsrf_token and myfaba_session and location_url:
+            logging.info("Loading page")
+            return xsrf_token, myfaba_session, location_url
             
-        logging.error(f"Unexpected response status: {response.status_code}")
+        logging.error("Session cookies or redirect location missing")
     except requests.RequestException as e:
-        logging.error(f"Failed to fetch parameters: {e}")
+        logging.error("Failed to fetch parameters: %s", e)
     return None, None, None
 
 
@@ -66,52 +137,91 @@ def fetch_parameters(session, xsrf_token, myfaba_session, location_url):
         response = session.get(location_url, headers=headers)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        form = soup.find("form", {"id": "form"})
+        parser = FormParser()
+        try:
+            parser.feed(response.text)
+        except StopIteration:
+            pass
+        action_url, _token = parser.action_url, parser.token
         
-        if form:
-            action_url = form["action"]
-            query_params = parse_qs(urlparse(action_url).query)
-            _token = soup.find("input", {"name": "_token"})
-            
-            if _token and action_url:
-                logging.info("Parameters extracted successfully")
-                return action_url, query_params.get("expires", [None])[0], query_params.get("signature", [None])[0], _token["value"]
+        if action_url and _token:
+            logging.info("Parameters extracted successfully")
+            return action_url, _token
             
         logging.error("Form or token not found")
     except requests.RequestException as e:
-        logging.error(f"Failed to fetch form parameters: {e}")
-    return None, None, None, None
+        logging.error("Failed to fetch form parameters: %s", e)
+    return None, None
 
 
-def get_wav_duration(wav_path):
+def get_wav_duration(wav_file):
     try:
-        with wave.open(wav_path, "rb") as wav_file:
-            return int(wav_file.getnframes() / float(wav_file.getframerate()))
-    except (wave.Error, FileNotFoundError) as e:
-        logging.error(f"Error reading WAV file: {e}")
+        header = wav_file.read(WAV_HEADER.size)
+
+        if len(header) == WAV_HEADER.size:
+            riff, _, wave_id, fmt_id, _, _, _, _, byte_rate, _, _, data_id, data_size = WAV_HEADER.unpack(header)
+            if (riff, wave_id, fmt_id, data_id) == (b"RIFF", b"WAVE", b"fmt ", b"data") and byte_rate:
+                # Streamed .wav files leave the data size unset (0 or 0xFFFFFFFF), data runs to end of file
+                if data_size in (0, 0xFFFFFFFF):
+                    data_size = os.fstat(wav_file.fileno()).st_size - WAV_HEADER.size
+                return data_size // byte_rate
+
+        # Non-canonical chunk layout, let the wave module walk the chunks
+        wav_file.seek(0)
+        with wave.open(wav_file, "rb") as wav:
+            return int(wav.getnframes() / float(wav.getframerate()))
+    except (wave.Error, OSError) as e:
+        logging.error("Error reading WAV file: %s", e)
+    finally:
+        wav_file.seek(0)
     return None
 
 
 def upload_wav(session, action_url, xsrf_token, myfaba_session, _token, wav_path, author, title):
-    duration = get_wav_duration(wav_path)
-    if duration is None:
-        logging.error("Invalid .wav file duration. Check .wav file")
-        return False
-    
     headers = {"Cookie": f"XSRF-TOKEN={xsrf_token}; myfaba_cms_session={myfaba_session}"}
-    data = {"_token": _token, "duration": str(duration), "creator": author, "title": title}
     
     try:
+        # Single open: the duration comes from the header, then the same handle is rewound and streamed
         with open(wav_path, "rb") as audio_file:
-            files = {"userAudio": ("recorded.wav", audio_file, "audio/wav")}
-            response = session.post(action_url, headers=headers, files=files, data=data)
+            duration = get_wav_duration(audio_file)
+            if duration is None:
+                logging.error("Invalid .wav file duration. Check .wav file")
+                return False
+
+            data = {"_token": _token, "duration": str(duration), "creator": author, "title": title}
+
+            # Stream the multipart body from disk instead of building it in memory
+            form = MultipartBody(data, "userAudio", "recorded.wav", audio_file, "audio/wav")
+            headers["Content-Type"] = form.content_type
+            response = session.post(action_url, headers=headers, data=form)
             response.raise_for_status()
             logging.info("Upload successfully completed!")
             logging.info("Check Faba mobile app")
             return True
     except (requests.RequestException, IOError) as e:
-        logging.error(f"Upload failed: {e}")
+        logging.error("Upload failed: %s", e)
+    return False
+
+
+def upload(session, share_id, author, title, wav_path):
+    # One complete share_id upload, batch uploads can call this per file (or per worker thread, one session each)
+    xsrf_token, myfaba_session, location_url = load_page(session, share_id)
+    
+    if xsrf_token and myfaba_session and location_url:
+        # expires/signature are parsed once here, the action_url carries them as-is
+        query_params = parse_qs(urlparse(location_url).query)
+        expires_timestamp = int(query_params.get('expires', [0])[0])
+        expires_datetime = datetime.fromtimestamp(expires_timestamp, tz=timezone.utc)
+        logging.info("share_id valid until: %s", expires_datetime.strftime('%Y-%m-%d %H:%M:%S UTC'))
+
+        action_url, _token = fetch_parameters(session, xsrf_token, myfaba_session, location_url)
+        
+        if action_url and _token:
+            success = upload_wav(session, action_url, xsrf_token, myfaba_session, _token, wav_path, author, title)
+            if not success:
+                logging.error("Upload failed, try again")
+            return success
+
     return False
 
 
@@ -128,22 +238,9 @@ def main():
         logging.error("Invalid share_id format")
         exit(1)
     
-    session = requests.Session()
-    xsrf_token, myfaba_session, location_url = load_page(session, args.share_id)
-    
-    if xsrf_token and myfaba_session and location_url:
-        parsed_url = urlparse(location_url)
-        query_params = parse_qs(parsed_url.query)
-        expires_timestamp = int(query_params.get('expires', [0])[0])
-        expires_datetime = datetime.utcfromtimestamp(expires_timestamp)
-        logging.info("share_id valid until: %s", expires_datetime.strftime('%Y-%m-%d %H:%M:%S UTC'))
-
-        action_url, expires, signature, _token = fetch_parameters(session, xsrf_token, myfaba_session, location_url)
-        
-        if action_url and _token:
-            success = upload_wav(session, action_url, xsrf_token, myfaba_session, _token, args.wav_path, args.author, args.title)
-            if not success:
-                logging.error("Upload failed, try again")
+    session = create_session()
+    if not upload(session, share_id, args.author, args.title, args.wav_path):
+        exit(1)
 
 
 if __name__ == "__main__":